@@ -7,8 +7,12 @@ Only allows alerts for signals that:
 """
 
 import json
+import logging
 import os
-from datetime import datetime, timedelta
+import time
+from datetime import datetime, timedelta, timezone
+
+logger = logging.getLogger(__name__)
 
 class FreshSignalDeduplicator:
     def __init__(self, freshness_minutes=2):
@@ -20,22 +24,42 @@ class FreshSignalDeduplicator:
         try:
             with open(self.cache_file, 'r') as f:
                 cache = json.load(f)
-            print(f"📁 Loaded fresh signal cache: {len(cache)} entries")
+            self.migrate_alerted_at(cache)
+            logger.info("📁 Loaded fresh signal cache: %d entries", len(cache))
             return cache
         except (FileNotFoundError, json.JSONDecodeError):
-            print("📁 Starting fresh signal cache")
+            logger.info("📁 Starting fresh signal cache")
             return {}
     
+    @staticmethod
+    def migrate_alerted_at(cache):
+        """Convert legacy ISO (naive UTC) alerted_at strings to epoch seconds"""
+        for data in cache.values():
+            alerted_at = data.get('alerted_at') if isinstance(data, dict) else None
+            if isinstance(alerted_at, str):
+                try:
+                    data['alerted_at'] = datetime.fromisoformat(alerted_at).replace(tzinfo=timezone.utc).timestamp()
+                except ValueError:
+                    pass  # Left invalid; cleanup_old_signals() drops it
+    
     def save_cache(self):
+        """Write the cache atomically so a crash never leaves a truncated file"""
         os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
-        with open(self.cache_file, 'w') as f:
-            json.dump(self.signal_cache, f, indent=2, default=str)
+        tmp_file = self.cache_file + '.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump(self.signal_cache, f, separators=(',', ':'), default=str)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.cache_file)
     
     def is_signal_fresh_and_new(self, symbol, signal_type, signal_timestamp):
         """
         Check if signal is:
         1. Fresh (within last 2 minutes)
         2. New (not already alerted)
+
+        Accepted signals are recorded in memory only - call save_cache()
+        once after the scan instead of rewriting the file per alert.
         """
         current_time = datetime.utcnow()
         
@@ -47,44 +71,45 @@ class FreshSignalDeduplicator:
         is_fresh = time_since_signal <= self.freshness_window
         
         if not is_fresh:
-            print(f"❌ {symbol} {signal_type}: STALE signal ({time_since_signal.total_seconds():.0f}s old)")
+            logger.debug("❌ %s %s: STALE signal (%.0fs old)",
+                         symbol, signal_type, time_since_signal.total_seconds())
             return False
         
         # Check 2: Is signal new (not already alerted)?
+        # setdefault checks and records in one dict operation, so two
+        # callers can never both claim the same signal
         signal_key = f"{symbol}_{signal_type}_{signal_timestamp.strftime('%Y%m%d_%H%M%S')}"
-        
-        if signal_key in self.signal_cache:
-            print(f"❌ {symbol} {signal_type}: DUPLICATE signal (already alerted)")
-            return False
-        
-        # Signal is both fresh and new - allow it
-        self.signal_cache[signal_key] = {
-            'alerted_at': current_time.isoformat(),
+        record = {
+            'alerted_at': time.time(),
             'signal_time': signal_timestamp.isoformat(),
             'freshness_seconds': time_since_signal.total_seconds()
         }
-        self.save_cache()
         
-        print(f"✅ {symbol} {signal_type}: FRESH & NEW signal ({time_since_signal.total_seconds():.0f}s ago)")
+        if self.signal_cache.setdefault(signal_key, record) is not record:
+            logger.debug("❌ %s %s: DUPLICATE signal (already alerted)", symbol, signal_type)
+            return False
+        
+        logger.info("✅ %s %s: FRESH & NEW signal (%.0fs ago)",
+                    symbol, signal_type, time_since_signal.total_seconds())
         return True
     
     def cleanup_old_signals(self):
         """Remove signal records older than 24 hours"""
-        cutoff_time = datetime.utcnow() - timedelta(hours=24)
+        cutoff_time = time.time() - 24 * 3600
         
+        # Records are kept in alert order (dicts and the JSON file preserve
+        # insertion order), so everything before the first live record is old
         old_keys = []
         for key, data in self.signal_cache.items():
-            try:
-                alerted_at = datetime.fromisoformat(data['alerted_at'])
-                if alerted_at < cutoff_time:
-                    old_keys.append(key)
-            except (ValueError, TypeError, KeyError):
-                old_keys.append(key)  # Remove invalid entries
+            alerted_at = data.get('alerted_at') if isinstance(data, dict) else None
+            if isinstance(alerted_at, (int, float)) and alerted_at >= cutoff_time:
+                break
+            old_keys.append(key)  # Expired or invalid
         
         for key in old_keys:
             del self.signal_cache[key]
         
         if old_keys:
             self.save_cache()
-            print(f"🧹 Cleaned {len(old_keys)} old signal records")
+            logger.info("🧹 Cleaned %d old signal records", len(old_keys))
 
@@ -3,108 +3,123 @@ Consolidated Telegram Alert System
 Sends ALL signals in ONE message - no more spam!
 """
 
-"""
-Consolidated Telegram Alert System
-Sends ALL signals in ONE message - no more spam!
-"""
-
 import os
+import json
 import requests
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Credentials are fixed for the lifetime of the process
+_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
+_CHAT_ID = os.getenv('HIGH_RISK_TELEGRAM_CHAT_ID')
+_SEND_URL = f"https://api.telegram.org/bot{_BOT_TOKEN}/sendMessage" if _BOT_TOKEN else None
+_PAYLOAD_BASE = {
+    'chat_id': _CHAT_ID,
+    'parse_mode': 'Markdown',
+    'disable_web_page_preview': False
+}
+_JSON_HEADERS = {'Content-Type': 'application/json'}
+
+# Keep-alive session reused for every Telegram post. Only failures where the
+# message cannot have been delivered are retried (connection errors, 429/503),
+# never read errors or gateway 502/504, so an alert is not posted twice.
+_SESSION = requests.Session()
+_SESSION.mount('https://', HTTPAdapter(
+    pool_connections=1,
+    pool_maxsize=4,
+    max_retries=Retry(
+        total=3,
+        connect=3,
+        read=0,
+        other=0,
+        backoff_factor=0.3,
+        status_forcelist=[429, 503],
+        allowed_methods=["POST"],
+    ),
+))
+
+# Per-signal rows (SELL rows also show signal age)
+BUY_ROW_TEMPLATE = """
+{i}. *{symbol}* | {price_fmt} | {change_24h:+.1f}%
+   Cap: ${market_cap_m:.0f}M | WT: {wt1:.1f}/{wt2:.1f}
+   {exchange} | [Chart →]({tv_link})"""
 
-def get_ist_time():
-    """Convert UTC to IST"""
-    utc_now = datetime.utcnow()
-    return utc_now + timedelta(hours=5, minutes=30)
+SELL_ROW_TEMPLATE = """
+{i}. *{symbol}* | {price_fmt} | {change_24h:+.1f}%
+   Cap: ${market_cap_m:.0f}M | WT: {wt1:.1f}/{wt2:.1f}
+   {exchange} | ⚡{age_s:.0f}s ago | [Chart →]({tv_link})"""
 
-def send_consolidated_alert(all_signals):
-    """
-    Send ONE consolidated message with ALL detected signals
-    """
-    bot_token = os.getenv('TELEGRAM_BOT_TOKEN')
-    chat_id = os.getenv('HIGH_RISK_TELEGRAM_CHAT_ID')
-    
-    if not bot_token or not chat_id or not all_signals:
-        return False
+IST = timezone(timedelta(hours=5, minutes=30))
 
+def get_ist_time():
+    """Current time in IST"""
+    return datetime.now(IST)
+
+def format_price(price):
+    """Format price with precision matched to its magnitude"""
+    if price < 0.001:
+        return f"${price:.8f}"
+    if price < 1:
+        return f"${price:.4f}"
+    return f"${price:.3f}"
+
+def tradingview_link(symbol):
+    """15m USDT chart link (a trailing USDT/USD quote is stripped first)"""
+    base = symbol.removesuffix('USDT').removesuffix('USD')
+    return f"https://www.tradingview.com/chart/?symbol={base}USDT&interval=15"
+
+def append_signal_rows(parts, signals, row_template):
+    """Render one numbered row per signal into parts"""
+    for i, signal in enumerate(signals, 1):
+        symbol = signal['symbol']
+        parts.append(row_template.format_map({
+            'i': i,
+            'symbol': symbol,
+            'price_fmt': format_price(signal['price']),
+            'change_24h': signal['change_24h'],
+            'market_cap_m': signal['market_cap'] / 1_000_000,
+            'wt1': signal['wt1'],
+            'wt2': signal['wt2'],
+            'exchange': signal['exchange'],
+            'age_s': signal.get('signal_age_seconds', 0),
+            'tv_link': tradingview_link(symbol),
+        }))
+
+def build_consolidated_message(all_signals):
+    """Build the Markdown text for one consolidated alert"""
     # Current IST time
     ist_time = get_ist_time()
     current_time_str = ist_time.strftime('%H:%M:%S IST')
 
-    # Group signals by type
-    buy_signals = [s for s in all_signals if s['signal_type'] == 'BUY']
-    sell_signals = [s for s in all_signals if s['signal_type'] == 'SELL']
-
-    # Build consolidated message
-    message = f"""🔧 *EXACT CIPHERB 15M ALERT*
+    # Group signals by type in a single pass
+    buy_signals, sell_signals = [], []
+    for signal in all_signals:
+        signal_type = signal['signal_type']
+        if signal_type == 'BUY':
+            buy_signals.append(signal)
+        elif signal_type == 'SELL':
+            sell_signals.append(signal)
+
+    # Build consolidated message (collect parts, join once)
+    parts = [f"""🔧 *EXACT CIPHERB 15M ALERT*
 🎯 *{len(all_signals)} PRECISE SIGNALS*
 🕐 *{current_time_str}*
 
-"""
+"""]
 
     # Add BUY signals section
     if buy_signals:
-        message += "🟢 *BUY SIGNALS:*\n"
-        for i, signal in enumerate(buy_signals, 1):
-            symbol = signal['symbol']
-            price = signal['price']
-            change_24h = signal['change_24h']
-            market_cap_m = signal['market_cap'] / 1_000_000
-            wt1 = signal['wt1']
-            wt2 = signal['wt2']
-            exchange = signal['exchange']
-            age_s = signal.get('signal_age_seconds', 0)
-
-            # Format price
-            if price < 0.001:
-                price_fmt = f"${price:.8f}"
-            elif price < 1:
-                price_fmt = f"${price:.4f}"
-            else:
-                price_fmt = f"${price:.3f}"
-
-            # TradingView link
-            clean_symbol = symbol.replace('USDT', '').replace('USD', '')
-            tv_link = f"https://www.tradingview.com/chart/?symbol={clean_symbol}USDT&interval=15"
-
-            message += f"""
-{i}. *{symbol}* | {price_fmt} | {change_24h:+.1f}%
-   Cap: ${market_cap_m:.0f}M | WT: {wt1:.1f}/{wt2:.1f}
-   {exchange} | [Chart →]({tv_link})"""
+        parts.append("🟢 *BUY SIGNALS:*\n")
+        append_signal_rows(parts, buy_signals, BUY_ROW_TEMPLATE)
 
     # Add SELL signals section
     if sell_signals:
-        message += f"\n\n🔴 *SELL SIGNALS:*\n"
-        for i, signal in enumerate(sell_signals, 1):
-            symbol = signal['symbol']
-            price = signal['price']
-            change_24h = signal['change_24h']
-            market_cap_m = signal['market_cap'] / 1_000_000
-            wt1 = signal['wt1']
-            wt2 = signal['wt2']
-            exchange = signal['exchange']
-            age_s = signal.get('signal_age_seconds', 0)
-
-
-            # Format price
-            if price < 0.001:
-                price_fmt = f"${price:.8f}"
-            elif price < 1:
-                price_fmt = f"${price:.4f}"
-            else:
-                price_fmt = f"${price:.3f}"
-
-            # TradingView link
-            clean_symbol = symbol.replace('USDT', '').replace('USD', '')
-            tv_link = f"https://www.tradingview.com/chart/?symbol={clean_symbol}USDT&interval=15"
-
-            message += f"""
-{i}. *{symbol}* | {price_fmt} | {change_24h:+.1f}%
-   Cap: ${market_cap_m:.0f}M | WT: {wt1:.1f}/{wt2:.1f}
-   {exchange} | ⚡{age_s:.0f}s ago | [Chart →]({tv_link})"""
+        parts.append("\n\n🔴 *SELL SIGNALS:*\n")
+        append_signal_rows(parts, sell_signals, SELL_ROW_TEMPLATE)
 
     # Update footer
-    message += f"""
+    parts.append(f"""
 
 📊 *FRESH SIGNAL SUMMARY:*
 • Total Signals: {len(all_signals)} (all within 2 minutes)
@@ -112,19 +127,28 @@ def send_consolidated_alert(all_signals):
 • Sell Signals: {len(sell_signals)}
 • Fresh Detection: ✅ No duplicates or stale alerts
 
-🎯 *Fresh Signal System v2.0*"""
+🎯 *Fresh Signal System v2.0*""")
+    return ''.join(parts)
+
+def send_consolidated_alert(all_signals):
+    """
+    Send ONE consolidated message with ALL detected signals
+    """
+    if not all_signals:
+        return False
+
+    if not _SEND_URL or not _CHAT_ID:
+        return False
+
+    message = build_consolidated_message(all_signals)
 
     # Send single consolidated message
-    url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
-    payload = {
-        'chat_id': chat_id,
-        'text': message,
-        'parse_mode': 'Markdown',
-        'disable_web_page_preview': False
-    }
+    payload = {**_PAYLOAD_BASE, 'text': message}
+    # Emoji-heavy text: UTF-8 body is much smaller than requests' ASCII-escaped json=
+    body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
 
     try:
-        response = requests.post(url, json=payload, timeout=30)
+        response = _SESSION.post(_SEND_URL, data=body, headers=_JSON_HEADERS, timeout=30)
         response.raise_for_status()
         print(f"📱 Consolidated alert sent: {len(all_signals)} signals")
         return True
@@ -8,12 +8,16 @@ Fresh 30-Minute CipherB Signal Analyzer
 
 import os
 import sys
+import logging
+import threading
 import time
 import json
 import ccxt
 import pandas as pd
 import yaml
-from datetime import datetime, timedelta
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 
 sys.path.insert(0, os.path.dirname(__file__))
 
@@ -21,14 +25,38 @@ from alerts.telegram_batch import send_consolidated_alert
 from alerts.deduplication_fresh import FreshSignalDeduplicator
 from indicators.cipherb_exact import detect_exact_cipherb_signals
 
+logger = logging.getLogger(__name__)
+
+# libyaml's C loader when PyYAML was built with it
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+IST = timezone(timedelta(hours=5, minutes=30))
+
 def get_ist_time():
-    """Convert UTC to IST"""
-    utc_now = datetime.utcnow()
-    return utc_now + timedelta(hours=5, minutes=30)
+    """Current time in IST"""
+    return datetime.now(IST)
+
+class RequestPacer:
+    """Locked stand-in for ccxt's throttle(): spaces requests rateLimit * cost ms apart across threads"""
+    def __init__(self, exchange):
+        self.rate_limit = exchange.rateLimit / 1000
+        self.lock = threading.Lock()
+        self.last_slot = None
+
+    def __call__(self, cost=None):
+        interval = self.rate_limit * (1 if cost is None else cost)
+        with self.lock:
+            now = time.monotonic()
+            slot = now if self.last_slot is None else max(now, self.last_slot + interval)
+            self.last_slot = slot
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
 
 class Fresh30mAnalyzer:
     def __init__(self):
         self.config = self.load_config()
+        self.workers = self.config['scan'].get('workers', 8)
         self.deduplicator = FreshSignalDeduplicator(freshness_minutes=30)  # 30-min window
         self.exchanges = self.init_exchanges()
         self.blocked_coins = self.load_blocked_coins()
@@ -37,7 +65,7 @@ class Fresh30mAnalyzer:
     def load_config(self):
         config_path = os.path.join(os.path.dirname(__file__), '..', 'config', 'config.yaml')
         with open(config_path) as f:
-            return yaml.safe_load(f)
+            return yaml.load(f, Loader=YAML_LOADER)
 
     def load_blocked_coins(self):
         """Load blocked coins from blocked_coins.txt"""
@@ -62,7 +90,7 @@ class Fresh30mAnalyzer:
         except Exception as e:
             print(f"⚠️ Error loading blocked coins: {e}")
         
-        return blocked_coins
+        return frozenset(blocked_coins)
 
     def load_market_data(self):
         """Load market data and filter out blocked coins"""
@@ -118,30 +146,50 @@ class Fresh30mAnalyzer:
         except Exception as e:
             print(f"⚠️ KuCoin failed: {e}")
         
+        # ccxt still throttles each request by its endpoint cost, but through
+        # a locked pacer so worker threads can share one client
+        for _, exchange in exchanges:
+            exchange.throttle = RequestPacer(exchange)
+        
+        # Grow each client's keep-alive pool (requests defaults to 10) to the
+        # worker count so concurrent fetches reuse connections instead of reopening them
+        for _, exchange in exchanges:
+            exchange.session.mount('https://', HTTPAdapter(pool_maxsize=max(self.workers, 10)))
+        
         return exchanges
 
+    def preload_markets(self):
+        """Load markets once up front so worker threads don't all trigger it"""
+        for exchange_name, exchange in self.exchanges:
+            try:
+                exchange.load_markets()
+            except Exception as e:
+                print(f"⚠️ {exchange_name} markets failed: {str(e)[:100]}")
+
     def fetch_30m_ohlcv(self, symbol):
         """Fetch 30-minute OHLCV data with timestamps"""
         
+        market_symbol = f"{symbol}/USDT"
+        
         for exchange_name, exchange in self.exchanges:
+            # Unlisted pairs would only raise BadSymbol; don't spend a request slot
+            if exchange.markets and market_symbol not in exchange.markets:
+                continue
+            
             try:
-                ohlcv = exchange.fetch_ohlcv(f"{symbol}/USDT", '30m', limit=200)
+                ohlcv = exchange.fetch_ohlcv(market_symbol, '30m', limit=200)
                 
-                if len(ohlcv) < 100:
+                # Validate the raw rows before building a DataFrame
+                if len(ohlcv) < 100 or not ohlcv[-1][4] > 0:
                     continue
                 
                 df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
                 df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+                # Index stays UTC for freshness checking; only the latest
+                # candle is converted to IST for display
                 df.set_index('timestamp', inplace=True)
                 
-                # Keep UTC timestamps for freshness checking
-                df['utc_timestamp'] = df.index
-                
-                # Convert index to IST for display
-                df.index = df.index + pd.Timedelta(hours=5, minutes=30)
-                
-                if len(df) > 50 and df['close'].iloc[-1] > 0:
-                    return df, exchange_name
+                return df, exchange_name
                 
             except Exception as e:
                 continue
@@ -150,13 +198,9 @@ class Fresh30mAnalyzer:
 
     def analyze_coin_fresh_signals(self, coin_data):
         """Analyze for FRESH SIGNALS ONLY - 30-minute timeframe"""
+        # Blocked coins were already dropped in load_market_data()
         symbol = coin_data.get('symbol', '').upper()
         
-        # Skip blocked coins
-        if symbol in self.blocked_coins:
-            print(f"🚫 Skipping blocked coin: {symbol}")
-            return None
-        
         try:
             # Fetch 30m data with timestamps
             price_df, exchange_used = self.fetch_30m_ohlcv(symbol)
@@ -170,16 +214,16 @@ class Fresh30mAnalyzer:
             
             # Only check the MOST RECENT CLOSED candle
             latest_signal = signals_df.iloc[-1]
-            signal_timestamp_utc = price_df['utc_timestamp'].iloc[-1]
-            signal_timestamp_ist = signals_df.index[-1]
+            signal_timestamp_utc = price_df.index[-1]
+            signal_timestamp_ist = signal_timestamp_utc + pd.Timedelta(hours=5, minutes=30)
             
-            # Debug output for verification
+            # Debug output for verification (LOG_LEVEL=DEBUG)
             current_time = datetime.utcnow()
             time_since_signal = current_time - signal_timestamp_utc.to_pydatetime()
             
-            print(f"🔍 {symbol} - Signal age: {time_since_signal.total_seconds():.0f}s")
-            print(f"   Signal time (IST): {signal_timestamp_ist.strftime('%H:%M:%S')}")
-            print(f"   BUY: {latest_signal['buySignal']} | SELL: {latest_signal['sellSignal']}")
+            logger.debug("🔍 %s - Signal age: %.0fs\n   Signal time (IST): %s\n   BUY: %s | SELL: %s",
+                         symbol, time_since_signal.total_seconds(), signal_timestamp_ist.time(),
+                         latest_signal['buySignal'], latest_signal['sellSignal'])
             
             # Check for FRESH BUY signal
             if latest_signal['buySignal']:
@@ -239,28 +283,33 @@ class Fresh30mAnalyzer:
         
         # Clean up old signal records first
         self.deduplicator.cleanup_old_signals()
+        self.preload_markets()
         
         # Collect FRESH 30m signals
         fresh_signals = []
         batch_size = 20
         total_analyzed = 0
         
-        for i in range(0, len(self.market_data), batch_size):
-            batch = self.market_data[i:i + batch_size]
-            batch_num = i // batch_size + 1
-            total_batches = (len(self.market_data) - 1) // batch_size + 1
-            
-            print(f"\n🔄 Processing batch {batch_num}/{total_batches}")
-            
-            for coin in batch:
-                signal_result = self.analyze_coin_fresh_signals(coin)
-                if signal_result:
-                    fresh_signals.append(signal_result)
-                    age_s = signal_result['signal_age_seconds']
-                    print(f"🚨 {signal_result['signal_type']}: {signal_result['symbol']} ({age_s:.0f}s ago)")
+        # Fetches are network-bound, so overlap them across worker threads;
+        # RequestPacer keeps each exchange within its rate limit
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for i in range(0, len(self.market_data), batch_size):
+                batch = self.market_data[i:i + batch_size]
+                batch_num = i // batch_size + 1
+                total_batches = (len(self.market_data) - 1) // batch_size + 1
                 
-                total_analyzed += 1
-                time.sleep(0.3)  # Rate limiting
+                print(f"\n🔄 Processing batch {batch_num}/{total_batches}")
+                
+                for signal_result in executor.map(self.analyze_coin_fresh_signals, batch):
+                    if signal_result:
+                        fresh_signals.append(signal_result)
+                        age_s = signal_result['signal_age_seconds']
+                        print(f"🚨 {signal_result['signal_type']}: {signal_result['symbol']} ({age_s:.0f}s ago)")
+                    
+                    total_analyzed += 1
+        
+        # Persist dedup records once for the whole scan
+        self.deduplicator.save_cache()
         
         # Send consolidated alert with FRESH 30m signals
         if fresh_signals:
@@ -286,5 +335,6 @@ class Fresh30mAnalyzer:
         print("="*80)
 
 if __name__ == '__main__':
+    logging.basicConfig(stream=sys.stdout, level=os.getenv('LOG_LEVEL', 'INFO'), format='%(message)s')
     analyzer = Fresh30mAnalyzer()
     analyzer.run_fresh_analysis()
@@ -10,11 +10,14 @@ import random
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+# libyaml's C loader when PyYAML was built with it
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
 class RobustMarketDataFetcher:
     def __init__(self):
         config_path = os.path.join(os.path.dirname(__file__), '..', 'config', 'config.yaml')
         with open(config_path) as f:
-            self.config = yaml.safe_load(f)
+            self.config = yaml.load(f, Loader=YAML_LOADER)
         self.blocked_coins = self.load_blocked_coins()
         self.session = self.create_robust_session()
 
@@ -64,7 +67,7 @@ class RobustMarketDataFetcher:
                     if symbol and not symbol.startswith('#'):
                         blocked.add(symbol)
         print(f"📋 Loaded {len(blocked)} blocked coins")
-        return blocked
+        return frozenset(blocked)
 
     def handle_rate_limit(self, response):
         """Handle rate limiting with proper delays"""
@@ -40,17 +40,17 @@ def detect_exact_cipherb_signals(df, config):
     signals['wt1'] = wt1
     signals['wt2'] = wt2
     
-    # EXACT Pine Script conditions
+    # EXACT Pine Script conditions, evaluated on a single wt1 - wt2 series
     # wtCross = ta.cross(wt1, wt2)
-    wt1_prev = wt1.shift(1)
-    wt2_prev = wt2.shift(1)
-    wtCross = ((wt1 > wt2) & (wt1_prev <= wt2_prev)) | ((wt1 < wt2) & (wt1_prev >= wt2_prev))
-    
     # wtCrossUp = wt2 - wt1 <= 0
-    wtCrossUp = (wt2 - wt1) <= 0
-    
-    # wtCrossDown = wt2 - wt1 >= 0  
-    wtCrossDown = (wt2 - wt1) >= 0
+    # wtCrossDown = wt2 - wt1 >= 0
+    # A cross that ends with wt1 above wt2 always satisfies wtCrossUp and one
+    # that ends below always satisfies wtCrossDown, so each combination is a
+    # strict sign change of the difference
+    wt_diff = wt1 - wt2
+    wt_diff_prev = wt_diff.shift(1)
+    wtCrossAndUp = (wt_diff > 0) & (wt_diff_prev <= 0)
+    wtCrossAndDown = (wt_diff < 0) & (wt_diff_prev >= 0)
     
     # wtOversold = wt1 <= -60 and wt2 <= -60
     wtOversold = (wt1 <= osLevel2) & (wt2 <= osLevel2)
@@ -59,7 +59,7 @@ def detect_exact_cipherb_signals(df, config):
     wtOverbought = (wt2 >= obLevel2) & (wt1 >= obLevel2)
     
     # EXACT Pine Script signal logic
-    signals['buySignal'] = wtCross & wtCrossUp & wtOversold
-    signals['sellSignal'] = wtCross & wtCrossDown & wtOverbought
+    signals['buySignal'] = wtCrossAndUp & wtOversold
+    signals['sellSignal'] = wtCrossAndDown & wtOverbought
     
     return signals